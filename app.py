@@ -1,10 +1,37 @@
 # app.py
+import hashlib
+import importlib.util
 import os
 from io import BytesIO
+import numpy as np
 import pandas as pd
+import pyarrow as pa
 import plotly.express as px
 import streamlit as st
 
+# calamine (Rust) reads .xlsx far faster than openpyxl; fall back if it isn't installed
+EXCEL_READ_ENGINE = "calamine" if importlib.util.find_spec("python_calamine") is not None else "openpyxl"
+
+# ciso8601 (C) parses ISO-8601 strings much faster than pandas' general date parser
+try:
+    import ciso8601
+except ImportError:
+    ciso8601 = None
+
+# xxhash fingerprints uploads much faster than Streamlit's own md5 pass over the bytes
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+# numba (optional) JIT-compiled kernels; None when numba isn't installed
+from tb_kernels import row_cumsum
+
+# Copy-on-Write (default from pandas 3): derived frames share data until written,
+# so prepare/apply_filters can work without defensive .copy() calls
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+
 st.set_page_config(page_title="Zack Financial — GL Dashboard + Rolling TB", layout="wide")
 st.markdown('<h1 style="text-align:center; font-size:48px; margin:0.2em 0;">Zack Financial</h1>', unsafe_allow_html=True)
 
@@ -21,7 +48,7 @@ def make_sample_gl_bytes() -> BytesIO:
         ["JE00003-2","Fund I","Assets","Cash","1000","Cash","Bank","Initial purchase", "2025-02-05", "100,000.00"],
     ], columns=["seq","Fund","FSLI.1","FSLI.3","GL Account","GL Account Name","reference","description","date","Net amount"])
     bio = BytesIO()
-    with pd.ExcelWriter(bio, engine="openpyxl") as w:
+    with pd.ExcelWriter(bio, engine="xlsxwriter") as w:
         df.to_excel(w, index=False, sheet_name="GL")
     bio.seek(0)
     return bio
@@ -59,21 +86,46 @@ EXPECTED = [
     "reference","description","date","Net amount"
 ]
 
+# dtype the Arrow-backed Excel read gives a column with no values at all
+NULL_ARROW_DTYPE = pd.ArrowDtype(pa.null())
+
+# Columns offered as sidebar multiselect filters
+ROLE_COLS = ["Fund","FSLI.1","FSLI.3","GL Account","GL Account Name","reference","description","seq"]
+
 def _norm(s): 
     return str(s).strip().lower()
 
 def parse_date(series):
-    s0 = pd.to_datetime(series, errors="coerce", infer_datetime_format=True)
+    # GLs repeat a handful of dates across many rows: parse each distinct value once,
+    # weight it by its row count, then broadcast the winner back to every row
+    raw = pd.Series(series)
+    codes, uniq = pd.factorize(raw)
+    uniq = pd.Series(uniq)
+    counts = np.bincount(codes[codes >= 0], minlength=len(uniq))
+
+    s0 = _parse_iso_dates(uniq)
+    if s0 is None:
+        s0 = pd.to_datetime(uniq, errors="coerce")
     def score(d):
-        if d is None: return -1
-        d = d.dropna()
-        if d.empty: return -1
-        y = d.dt.year
-        return int(y.between(1990,2100).sum())
+        if d.notna().sum() == 0: return -1
+        return int(counts[d.dt.year.between(1990,2100).to_numpy()].sum())
     best, best_sc = s0, score(s0)
+    if best_sc == int(counts.sum()):
+        return _broadcast(best.dt.normalize(), codes, raw.index)  # every value parsed to a plausible date
+
+    # Arrow-backed reads store mixed date/text columns as strings in differing formats;
+    # parse those value by value (cheap: distinct values only)
+    if not pd.api.types.is_numeric_dtype(uniq):
+        cand = pd.to_datetime(uniq, errors="coerce", format="mixed")
+        sc = score(cand)
+        if sc > best_sc:
+            best, best_sc = cand, sc
 
     # try numeric conversions (Excel serials, unix seconds/ms)
-    nums = pd.to_numeric(pd.Series(series).astype(str).str.replace(",","",regex=False).str.strip(), errors="coerce")
+    if pd.api.types.is_numeric_dtype(uniq):
+        nums = pd.to_numeric(uniq, errors="coerce").astype("float64")
+    else:
+        nums = pd.to_numeric(uniq.astype(str).str.replace(",","",regex=False).str.strip(), errors="coerce")
     if nums.notna().sum() > 0:
         for unit, origin in [("d","1899-12-30"),("s",None),("ms",None)]:
             try:
@@ -83,29 +135,54 @@ def parse_date(series):
                     best, best_sc = cand, sc
             except:
                 pass
-    return best.dt.normalize()
+    return _broadcast(best.dt.normalize(), codes, raw.index)
+
+def _parse_iso_dates(values):
+    """Fast path for all-ISO string dates via ciso8601; None means use pandas instead."""
+    if ciso8601 is None:
+        return None
+    try:
+        parsed = [ciso8601.parse_datetime_as_naive(v) for v in values]
+        return pd.Series(pd.to_datetime(parsed), index=values.index)
+    except (TypeError, ValueError):
+        return None
 
 def parse_amount(series):
-    s = pd.Series(series).astype(str).str.replace(",","",regex=False).str.strip()
-    s = s.replace(r"\((.*)\)", r"-\1", regex=True)  # (1,234.56) -> -1,234.56
-    return pd.to_numeric(s, errors="coerce")
+    s = pd.Series(series)
+    if pd.api.types.is_numeric_dtype(s):
+        return pd.to_numeric(s, errors="coerce").astype("float64")
+    # amounts repeat too (fees, recurring entries): clean each distinct string once
+    codes, uniq = pd.factorize(s)
+    # Arrow-backed strings run the .str kernels in C++ instead of per-object Python
+    u = pd.Series(uniq).astype("string[pyarrow]").str.replace(r"[,\s]", "", regex=True)
+    u = u.str.replace(r"^\((.*)\)$", r"-\1", regex=True)  # (1234.56) -> -1234.56
+    return _broadcast(pd.to_numeric(u, errors="coerce").astype("float64"), codes, s.index)
+
+def _broadcast(parsed, codes, index):
+    """Expand per-unique parse results back to rows; code -1 (missing input) becomes NA."""
+    return pd.Series(parsed.array.take(codes, allow_fill=True), index=index)
 
 def load_gl_sheet(uploaded_file):
-    xls = pd.ExcelFile(uploaded_file, engine="openpyxl")
+    xls = pd.ExcelFile(uploaded_file, engine=EXCEL_READ_ENGINE)
     sheet_name = "GL" if "GL" in [str(s) for s in xls.sheet_names] else xls.sheet_names[0]
-    df = xls.parse(sheet_name)
+    # Arrow-backed columns: typed cells stay typed, text goes straight to string[pyarrow]
+    df = xls.parse(sheet_name, dtype_backend="pyarrow")
     return df, sheet_name
 
 def prepare(df):
-    d = df.copy()
+    d = df  # every step below returns a new frame; the caller's df is never mutated
 
     # rename columns to canonical forms when names match ignoring case/space
+    # (skipped entirely when the sheet already uses the canonical headers, e.g. the sample GL)
     rename = {}
-    for want in EXPECTED:
+    if not set(EXPECTED).issubset(d.columns):
+        by_norm = {}
         for c in d.columns:
-            if _norm(c) == _norm(want):
+            by_norm.setdefault(_norm(c), c)  # first matching column wins
+        for want in EXPECTED:
+            c = by_norm.get(_norm(want))
+            if c is not None:
                 rename[c] = want
-                break
     if rename:
         d = d.rename(columns=rename)
 
@@ -115,55 +192,76 @@ def prepare(df):
     if "Net amount" not in d.columns:
         st.error("Missing required 'Net amount' column."); st.stop()
 
-    d["Date"] = parse_date(d["date"])
-    d["Amount"] = parse_amount(d["Net amount"])
+    d = d.assign(Date=parse_date(d["date"]), Amount=parse_amount(d["Net amount"]))
     d = d.dropna(subset=["Date","Amount"])
 
     # Month column for groupings
-    d["Month"] = d["Date"].dt.to_period("M").dt.to_timestamp()
-    return d
+    d = d.assign(Month=d["Date"].dt.to_period("M").dt.to_timestamp())
 
-def apply_filters(df):
-    d = df.copy()
+    # keep only what the views read: the raw 'date'/'Net amount' text (now parsed into
+    # Date/Amount) and any extra workbook columns would otherwise ride along in every
+    # cached copy and filtered slice
+    d = d[[c for c in ROLE_COLS + ["Date","Amount","Month"] if c in d.columns]]
+
+    # all-blank columns arrive as null[pyarrow], which can't back categories: give them a string type
+    roles = [col for col in ROLE_COLS if col in d.columns]
+    d = d.astype({col: "string[pyarrow]" for col in roles if d[col].dtype == NULL_ARROW_DTYPE})
+
+    # role columns as categoricals: filter options and isin work on small integer codes
+    return d.astype({col: "category" for col in roles})
+
+def _file_digest(data: bytes) -> str:
+    """Content fingerprint of an upload, used as its cache key."""
+    if xxhash is not None:
+        return xxhash.xxh3_64_hexdigest(data)
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+# the cache is shared by every session: keep only a few recent uploads, and not forever
+@st.cache_data(show_spinner=False, max_entries=8, ttl="1h")
+def _load_and_prepare(digest: str, _file_bytes: bytes):
+    """Parse + prepare an upload once per digest; the underscore keeps Streamlit from hashing the bytes."""
+    raw, sheet = load_gl_sheet(BytesIO(_file_bytes))
+    return prepare(raw), sheet
 
+def apply_filters(df):
     # date range
-    mn, mx = d["Date"].min(), d["Date"].max()
+    mn, mx = df["Date"].min(), df["Date"].max()
     start, end = st.sidebar.slider(
         "Date range",
         min_value=mn.to_pydatetime(),
         max_value=mx.to_pydatetime(),
         value=(mn.to_pydatetime(), mx.to_pydatetime())
     )
-    d = d[(d["Date"] >= pd.to_datetime(start)) & (d["Date"] <= pd.to_datetime(end))]
+    dv = df["Date"].to_numpy()  # compare raw datetime64 values, skipping pandas' Timestamp ops
+    masks = [dv >= np.datetime64(start), dv <= np.datetime64(end)]
 
-    # role filters
-    for col in ["Fund","FSLI.1","FSLI.3","GL Account","GL Account Name","reference","description","seq"]:
-        if col in d.columns:
-            opts = sorted(d[col].dropna().astype(str).unique())
-            pick = st.sidebar.multiselect(f"Filter {col}", options=opts)
+    # role filters: one boolean mask per picked column, ANDed and sliced once at the end
+    for col in ROLE_COLS:
+        if col in df.columns:
+            pick = st.sidebar.multiselect(f"Filter {col}", options=df[col].cat.categories.tolist())
             if pick:
-                d = d[d[col].astype(str).isin(pick)]
-    return d
-
-def fmt_currency(x):
-    try: return f"${x:,.2f}"
-    except Exception: return x
-
-def fmt_date(series):
-    s = pd.to_datetime(series, errors="coerce")
-    return s.dt.strftime("%m/%d/%Y")
+                # match on the integer category codes; no values are materialised
+                wanted = df[col].cat.categories.get_indexer(pick)
+                masks.append(np.isin(df[col].cat.codes.to_numpy(), wanted[wanted >= 0]))
+    return df[np.logical_and.reduce(masks)]
 
 def display_df_with_formats(df, currency_cols=None, date_cols=None):
-    d = df.copy()
-    if date_cols:
-        for c in date_cols:
-            if c in d.columns:
-                d[c] = fmt_date(d[c])
-    if currency_cols:
-        for c in currency_cols:
-            if c in d.columns:
-                d[c] = d[c].apply(fmt_currency)
-    st.dataframe(d, hide_index=True, use_container_width=True)
+    # formats are applied client-side via column_config: no copy, no per-cell Python formatting
+    config = {c: st.column_config.NumberColumn(format="dollar") for c in (currency_cols or []) if c in df.columns}
+    config.update({c: st.column_config.DateColumn(format="MM/DD/YYYY") for c in (date_cols or []) if c in df.columns})
+    st.dataframe(df, column_config=config, hide_index=True, use_container_width=True)
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _monthly_sums(sig, keys, _df):
+    """Amount per (keys..., Month); `_df` is not hashed, `sig` identifies its contents."""
+    return _df.groupby(list(keys) + ["Month"], observed=True)["Amount"].sum()
+
+def monthly_sums(df, keys):
+    """Cached per-account monthly aggregation for the trial balance view."""
+    # only worth it for multi-key groupbys: hashing the frame costs more than a Month-only sum
+    cols = list(keys) + ["Month", "Amount"]
+    sig = int(pd.util.hash_pandas_object(df[cols], index=False).sum())
+    return _monthly_sums(sig, tuple(keys), df)
 
 def dashboard_view(df):
     st.subheader("Dashboard")
@@ -176,7 +274,7 @@ def dashboard_view(df):
     c4.metric("# Rows", f"{len(df):,}")
 
     # monthly net bar
-    m = df.groupby("Month", as_index=False)["Amount"].sum().sort_values("Month")
+    m = df.groupby("Month", as_index=False)["Amount"].sum()
     fig = px.bar(m, x="Month", y="Amount", title="Monthly Net Activity")
     fig.update_yaxes(tickprefix="$", separatethousands=True)
     st.plotly_chart(fig, use_container_width=True)
@@ -188,14 +286,15 @@ def dashboard_view(df):
 def transactions_download_button(df):
     cols_pref = ["Date","Amount","Fund","FSLI.1","FSLI.3","GL Account","GL Account Name","reference","description","seq"]
     cols = [c for c in cols_pref if c in df.columns]
-    out = df.copy()
-    if "Date" in out.columns:
-        out["Date"] = pd.to_datetime(out["Date"], errors="coerce")
-    if "Amount" in out.columns:
-        out["Amount"] = pd.to_numeric(out["Amount"], errors="coerce")
+    out = df[cols]
+    # prepare() already typed these; only coerce if a caller hands in raw columns
+    if "Date" in cols and not pd.api.types.is_datetime64_any_dtype(out["Date"]):
+        out = out.assign(Date=pd.to_datetime(out["Date"], errors="coerce"))
+    if "Amount" in cols and not pd.api.types.is_numeric_dtype(out["Amount"]):
+        out = out.assign(Amount=pd.to_numeric(out["Amount"], errors="coerce"))
     bio = BytesIO()
-    with pd.ExcelWriter(bio, engine="openpyxl") as w:
-        out[cols].to_excel(w, index=False, sheet_name="Transactions_Filtered")
+    with pd.ExcelWriter(bio, engine="xlsxwriter") as w:
+        out.to_excel(w, index=False, sheet_name="Transactions_Filtered")
     bio.seek(0)
     st.download_button(
         "Download filtered transactions (Excel)",
@@ -205,6 +304,10 @@ def transactions_download_button(df):
         use_container_width=True
     )
 
+# below this many cells numpy's cumsum is already sub-millisecond, so the JIT path isn't worth
+# its one-off cost per server process (~0.4 s loading from numba's disk cache, ~0.7 s compiling)
+JIT_CUMSUM_MIN_CELLS = 200_000
+
 def trial_balance_view(df):
     st.subheader("Rolling Monthly Trial Balance (Cumulative)")
     idx = [c for c in ["GL Account","GL Account Name","FSLI.1","FSLI.3","Fund"] if c in df.columns]
@@ -212,14 +315,20 @@ def trial_balance_view(df):
         st.error("Need 'GL Account' and 'GL Account Name' columns.")
         return
 
-    monthly_tb = df.groupby(idx + ["Month"], as_index=False)["Amount"].sum()
-    pivot_mov = monthly_tb.pivot_table(index=idx, columns="Month", values="Amount", aggfunc="sum", fill_value=0)
-    month_cols = sorted(list(pivot_mov.columns), key=lambda x: pd.Timestamp(x))
-    pivot_cum = pivot_mov[month_cols].cumsum(axis=1)
-    pivot_cum["Grand Total"] = pivot_cum[month_cols[-1]] if month_cols else 0
+    # one sorted groupby, months unstacked into columns (already in calendar order)
+    pivot_mov = monthly_sums(df, idx).unstack("Month", fill_value=0)
+    month_cols = pd.DatetimeIndex(pivot_mov.columns, name="Month")
+    # running total along each account row: make rows contiguous in memory first
+    vals = np.ascontiguousarray(pivot_mov.to_numpy(dtype="float64"))
+    if row_cumsum is not None and vals.size > JIT_CUMSUM_MIN_CELLS:
+        cum = row_cumsum(vals)
+    else:
+        cum = vals.cumsum(axis=1)
+    pivot_cum = pd.DataFrame(cum, index=pivot_mov.index, columns=month_cols)
+    pivot_cum["Grand Total"] = pivot_cum[month_cols[-1]] if len(month_cols) else 0
 
-    # pretty display (month labels)
-    display_cols = [(c.strftime("%m/%d/%Y") if hasattr(c, "strftime") else str(c)) for c in pivot_cum.columns]
+    # pretty display (month labels), formatted in one vectorised call
+    display_cols = month_cols.strftime("%m/%d/%Y").tolist() + ["Grand Total"]
     out_display = pivot_cum.copy()
     out_display.columns = display_cols
     out_display = out_display.reset_index()
@@ -231,8 +340,8 @@ def trial_balance_view(df):
     display_df_with_formats(out_display, currency_cols=currency_cols, date_cols=None)
 
     bio = BytesIO()
-    with pd.ExcelWriter(bio, engine="openpyxl") as w:
-        out_export.to_excel(w, index=False, sheet_name="Rolling_Trial_Balance_Cumulative")
+    with pd.ExcelWriter(bio, engine="xlsxwriter") as w:
+        out_export.to_excel(w, index=False, sheet_name="Rolling_TB_Cumulative")
     bio.seek(0)
     st.download_button(
         "Download Rolling Trial Balance (Cumulative, Excel)",
@@ -250,13 +359,13 @@ def main():
         st.info("Upload your GL workbook (we'll use the 'GL' tab if present, or the first sheet).")
         return
 
+    file_bytes = uploaded.getvalue()
     try:
-        raw, sheet = load_gl_sheet(uploaded)
+        df, sheet = _load_and_prepare(_file_digest(file_bytes), file_bytes)
     except Exception as e:
         st.error(f"Failed to read Excel: {e}")
         return
 
-    df = prepare(raw)
     st.caption(f"Sheet used: **{sheet}** | Rows loaded: **{len(df):,}**")
 
     st.sidebar.header("Filters")
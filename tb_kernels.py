@@ -0,0 +1,25 @@
+# tb_kernels.py
+# numba kernels for app.py. They live in their own module so the compiled dispatcher stays in
+# sys.modules across Streamlit reruns (app.py itself is re-executed on every interaction).
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+if njit is not None:
+    # serial on purpose: Streamlit sessions call this from concurrent threads, and numba's
+    # fallback `workqueue` threading layer aborts the process on concurrent parallel=True calls
+    @njit(cache=True)
+    def row_cumsum(a):
+        """Running total along each row, walking the contiguous month axis."""
+        out = np.empty_like(a)
+        for i in range(a.shape[0]):
+            s = 0.0
+            for j in range(a.shape[1]):
+                s += a[i, j]
+                out[i, j] = s
+        return out
+else:
+    row_cumsum = None